@@ -4,37 +4,99 @@ warnings.filterwarnings("ignore", message="No secrets files found.*")
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import time
 import os
-import json
+import io
+import math
+import uuid
+import functools
+import itertools
+from collections import deque
 from datetime import datetime
 from dotenv import load_dotenv
-from enhanced_scraper import EnhancedRedditScraper
+from export_utils import csv_bytes, json_text, json_bytes
 
-# Disable static file serving to prevent the warning
-os.environ['STREAMLIT_SERVER_ENABLE_STATIC_SERVING'] = 'false'
+# Static file serving is disabled in .streamlit/config.toml; the server reads it
+# before any script runs, so it can't be changed from here
 
 # Note: Page configuration and session state initialization are handled in app.py
 
+# Timestamp format written by EnhancedRedditScraper
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Post fields produced by EnhancedRedditScraper.scrape_subreddit
+POST_COLUMNS = ['title', 'text', 'url', 'score', 'id', 'author', 'created_utc',
+                'upvote_ratio', 'num_comments', 'permalink', 'matching_comments']
+
+# Columns added by results_to_dataframe that are not part of the scraped data
+DERIVED_COLUMNS = ['created_date', 'has_matching_comments']
+
+# Columns shown in the Results tab table, mapped to their display names
+DISPLAY_COLUMNS = {
+    'title': 'Title',
+    'score': 'Score',
+    'num_comments': 'Comments',
+    'created_utc': 'Date',
+    'permalink': 'URL'
+}
+
+# Row counts offered by the Results tab table pager
+PAGE_SIZES = [25, 50, 100, 200]
+
+# Characters of post text shown before "Show full content" is ticked
+TEXT_PREVIEW_CHARS = 500
+
+# Export formats offered in the Export tab, mapped to file extension and MIME type
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'JSON': ('json', 'application/json'),
+    'JSON (zstd)': ('json.zst', 'application/zstd'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet')
+}
+
+# Number of past searches kept in the Search History tab
+MAX_SEARCH_HISTORY = 100
+
+# Most recent searches shown before "Show older searches" is ticked
+HISTORY_PREVIEW = 10
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
 # Functions
+@functools.lru_cache(maxsize=None)
+def load_env_once():
+    """Load the .env file into os.environ once per process rather than on every rerun"""
+    load_dotenv()
+
+@st.cache_resource(show_spinner=False)
+def get_scraper(client_id, client_secret, user_agent):
+    """Build one scraper per set of credentials, shared across reruns and sessions
+    
+    Keeps PRAW's OAuth token and HTTP connection pool alive between searches.
+    """
+    # Imported here so PRAW is only loaded once the user connects
+    from enhanced_scraper import EnhancedRedditScraper
+    
+    return EnhancedRedditScraper(
+        client_id=client_id,
+        client_secret=client_secret,
+        user_agent=user_agent
+    )
+
 def initialize_scraper(client_id, client_secret, user_agent):
     """Initialize the scraper with API credentials"""
     try:
-        scraper = EnhancedRedditScraper(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent
-        )
-        st.session_state.scraper = scraper
+        st.session_state.scraper = get_scraper(client_id, client_secret, user_agent)
         return True
     except Exception as e:
         st.error(f"Failed to initialize scraper: {str(e)}")
         return False
 
 def run_search(subreddits, keywords, limit, sort_by, include_comments, 
-               include_selftext, min_score):
+               include_selftext, min_score, combined_listing=False, server_search=False):
     """Run the search with provided parameters"""
     if not st.session_state.scraper:
         st.error("Scraper not initialized. Please set up API credentials first.")
@@ -42,123 +104,336 @@ def run_search(subreddits, keywords, limit, sort_by, include_comments,
     
     try:
         with st.spinner("Scraping Reddit..."):
-            if len(subreddits) == 1:
-                # Single subreddit search
-                results = st.session_state.scraper.scrape_subreddit(
-                    subreddit_name=subreddits[0],
-                    keywords=keywords,
-                    limit=limit,
-                    sort_by=sort_by,
-                    include_comments=include_comments,
-                    include_selftext=include_selftext,
-                    min_score=min_score
-                )
-                st.session_state.results = {subreddits[0]: results}
-            else:
-                # Multiple subreddit search
-                results = st.session_state.scraper.search_multiple_subreddits(
-                    subreddits=subreddits,
-                    keywords=keywords,
-                    limit=limit,
-                    sort_by=sort_by,
-                    include_comments=include_comments,
-                    include_selftext=include_selftext,
-                    min_score=min_score
-                )
-                st.session_state.results = results
+            st.session_state.results = fetch_results(
+                st.session_state.scraper, tuple(subreddits), tuple(keywords), limit, sort_by,
+                include_comments, include_selftext, min_score, combined_listing, server_search)
+            
+            # New cache key for the flattened results DataFrame
+            st.session_state.search_id = uuid.uuid4().hex
             
-            # Add to search history
+            # Count posts once per search instead of re-walking the results dict
+            st.session_state.total_posts = sum(map(len, st.session_state.results.values()))
+            
+            # Add to search history, newest first; numbered explicitly since old entries roll off
+            history = st.session_state.search_history
             search_info = {
+                'number': history[0]['number'] + 1 if history else 1,
                 'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'subreddits': subreddits,
                 'keywords': keywords,
-                'total_results': sum(len(results) for results in st.session_state.results.values())
+                'total_results': st.session_state.total_posts
             }
-            st.session_state.search_history.append(search_info)
+            history.appendleft(search_info)
             
             return True
     except Exception as e:
         st.error(f"Search failed: {str(e)}")
         return False
 
-def filter_results(results, filters):
-    """Apply filters to results"""
-    filtered = {}
+@st.cache_data(ttl=300, max_entries=50, show_spinner=False)
+def fetch_results(_scraper, subreddits, keywords, limit, sort_by, include_comments,
+                  include_selftext, min_score, combined_listing=False, server_search=False):
+    """Scrape the subreddits, reusing results of an identical search from the last 5 minutes
     
-    for subreddit, posts in results.items():
-        filtered_posts = []
-        
-        for post in posts:
-            # Apply score filter
-            if post['score'] < filters['min_score']:
-                continue
-                
-            # Apply date filters if set
-            if filters['date_from'] or filters['date_to']:
-                post_date = datetime.strptime(post['created_utc'], '%Y-%m-%d %H:%M:%S')
-                
-                if filters['date_from'] and post_date < filters['date_from']:
-                    continue
-                if filters['date_to'] and post_date > filters['date_to']:
-                    continue
-            
-            # Filter for posts with comments if requested
-            if filters['show_only_with_comments'] and (
-                'matching_comments' not in post or not post['matching_comments']):
-                continue
-                
-            filtered_posts.append(post)
-            
-        filtered[subreddit] = filtered_posts
+    Repeated searches return from memory instead of spending Reddit's rate limit budget.
+    """
+    if len(subreddits) == 1:
+        # Single subreddit search, counting hits as they stream in
+        status = st.empty()
+        results = []
+        for post in _scraper.iter_subreddit(
+            subreddit_name=subreddits[0],
+            keywords=list(keywords),
+            limit=limit,
+            sort_by=sort_by,
+            include_comments=include_comments,
+            include_selftext=include_selftext,
+            min_score=min_score,
+            server_search=server_search
+        ):
+            results.append(post)
+            status.caption(f"Found {len(results)} matching posts in r/{subreddits[0]}: {post['title'][:80]}")
+        status.empty()
+        return {subreddits[0]: results}
+    
+    if combined_listing:
+        # One merged r/a+b+c listing instead of a request stream per subreddit
+        return _scraper.scrape_combined(
+            subreddits=list(subreddits),
+            keywords=list(keywords),
+            limit=limit,
+            sort_by=sort_by,
+            include_comments=include_comments,
+            include_selftext=include_selftext,
+            min_score=min_score,
+            server_search=server_search
+        )
+    
+    # Multiple subreddit search, fetched concurrently by the scraper. The progress
+    # bar is created here because cached functions may only draw into their own elements
+    progress = st.progress(0.0, text="Scraping subreddits...")
+    
+    def update_progress(completed, total, subreddit):
+        progress.progress(completed / total, text=f"Scraped r/{subreddit} ({completed}/{total})")
+    
+    results = _scraper.search_multiple_subreddits(
+        subreddits=list(subreddits),
+        keywords=list(keywords),
+        limit=limit,
+        sort_by=sort_by,
+        include_comments=include_comments,
+        include_selftext=include_selftext,
+        min_score=min_score,
+        server_search=server_search,
+        progress_callback=update_progress
+    )
+    progress.empty()
+    return results
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def results_to_dataframe(_results, search_id):
+    """Flatten per-subreddit results into one DataFrame with pre-parsed dates
+    
+    The results dict is not hashed; search_id identifies the search it came from.
+    Cached as a resource so reruns share one frame instead of unpickling a copy
+    of every post's text; callers must treat it as read-only.
+    """
+    # Build each subreddit's frame column-wise and broadcast the subreddit name
+    frames = [pd.DataFrame(posts, columns=POST_COLUMNS).assign(subreddit=subreddit)
+              for subreddit, posts in _results.items() if posts]
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = pd.DataFrame(columns=POST_COLUMNS + ['subreddit'])
+    
+    # Subreddit names and authors repeat heavily; categoricals store them as int codes
+    df['subreddit'] = pd.Categorical(df['subreddit'], categories=list(_results.keys()))
+    df['author'] = df['author'].astype('category')
+    
+    # Reddit scores and comment counts fit comfortably in int32, halving the
+    # bytes scanned by the filter mask, quantiles and groupbys
+    df = df.astype({'score': 'int32', 'num_comments': 'int32'})
+    
+    # Parse timestamps once so filters compare datetime64 values instead of strings
+    df['created_date'] = pd.to_datetime(df['created_utc'], format=DATE_FORMAT,
+                                        errors='coerce', cache=True)
+    
+    # Posts without matching comments have no list at all (NaN), so guard with notna
+    df['has_matching_comments'] = (df['matching_comments'].notna()
+                                   & df['matching_comments'].astype(bool))
+    return df
+
+def _filters_key(filters):
+    """Freeze the filter settings into a flat tuple for keying cached results"""
+    return (filters['min_score'],
+            filters['date_from'].toordinal() if filters['date_from'] else 0,
+            filters['date_to'].toordinal() if filters['date_to'] else 0,
+            filters['show_only_with_comments'])
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def filtered_positions(_df, search_id, filters_key, _filters):
+    """Row positions of the results DataFrame that pass the filters
+    
+    The predicate runs on the underlying numpy arrays, which skips the index
+    alignment pandas performs for every Series comparison. Memoized on
+    (search_id, filters_key); caching positions rather than the filtered frame
+    keeps each cache hit to unpickling one small integer array.
+    """
+    df, filters = _df, _filters
+    mask = df['score'].to_numpy() >= filters['min_score']
+    
+    # Apply date filters if set (date_to is inclusive of the whole day)
+    if filters['date_from'] or filters['date_to']:
+        created = df['created_date'].to_numpy()
+        if filters['date_from']:
+            mask &= created >= np.datetime64(filters['date_from'])
+        if filters['date_to']:
+            mask &= created < np.datetime64(filters['date_to']) + np.timedelta64(1, 'D')
+    
+    # Filter for posts with comments if requested
+    if filters['show_only_with_comments']:
+        mask &= df['has_matching_comments'].to_numpy()
+    
+    return np.flatnonzero(mask)
+
+def filter_results(df, search_id, filters):
+    """Apply filters to the results DataFrame"""
+    return df.iloc[filtered_positions(df, search_id, _filters_key(filters), filters)]
+
+def dataframe_to_parquet_buffer(df):
+    """Serialize a DataFrame to an in-memory Parquet buffer
+    
+    Nested columns such as matching_comments are stored as native Arrow
+    list/struct columns rather than JSON strings.
+    """
+    buf = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buf, compression='zstd')
+    buf.seek(0)
+    return buf
+
+def zstd_compress(data):
+    """Compress bytes into a standard .zst stream with PyArrow's bundled zstd codec"""
+    sink = pa.BufferOutputStream()
+    with pa.CompressedOutputStream(sink, 'zstd') as stream:
+        stream.write(data)
+    return sink.getvalue().to_pybytes()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def export_bytes(_df, search_id, filters_key, export_format):
+    """Serialize the filtered results in one of EXPORT_FORMATS
+    
+    Memoized on (search_id, filters_key, export_format), so exporting the same
+    view again reuses the bytes instead of re-serializing every post.
+    """
+    # Drop the columns derived for filtering; export only the scraped data. As in
+    # the original exports, matching_comments is only included when some post has it
+    has_comments = bool(_df['has_matching_comments'].any())
+    df = _df.drop(columns=DERIVED_COLUMNS if has_comments else DERIVED_COLUMNS + ['matching_comments'])
+    
+    if export_format == 'CSV':
+        # Handle nested structures for CSV; posts without matching comments hold NaN
+        if has_comments:
+            df['matching_comments'] = df['matching_comments'].map(json_text, na_action='ignore').fillna('')
+        return csv_bytes(df)
+    
+    if export_format == 'Parquet':
+        # Parquet keeps matching_comments nested
+        return dataframe_to_parquet_buffer(df).getvalue()
+    
+    # JSON: drop the NaN matching_comments key as the scraper does
+    all_results = df.to_dict('records')
+    for post in all_results:
+        if not isinstance(post.get('matching_comments'), list):
+            post.pop('matching_comments', None)
+    json_data = json_bytes(all_results)
+    
+    # Repetitive post JSON shrinks several-fold under zstd
+    return zstd_compress(json_data) if export_format == 'JSON (zstd)' else json_data
+
+# Plotting libraries are imported on first use so the app starts without loading them
+@functools.lru_cache(maxsize=None)
+def _plotly_express():
+    """Return the plotly.express module, importing it on first call"""
+    import plotly.express as px
+    return px
+
+@functools.lru_cache(maxsize=None)
+def _pyplot():
+    """Return matplotlib.pyplot for the fallback charts, importing it on first call"""
+    import matplotlib.pyplot as plt
+    return plt
+
+# Figure builders are cached as resources keyed on (search_id, filters_key), so reruns
+# that don't change the search or filters reuse the figure. Underscored arguments are not hashed.
+@st.cache_resource(show_spinner=False, max_entries=64)
+def score_histogram_figure(data_key, _plot_df, nbins):
+    """Build the score distribution histogram"""
+    px = _plotly_express()
+    fig = px.histogram(_plot_df, x="score", color="subreddit", nbins=nbins,
+                       title="Distribution of Post Scores")
+    fig.update_layout(
+        xaxis_title="Score (Upvotes)",
+        yaxis_title="Number of Posts",
+        legend_title="Subreddit"
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def subreddit_bar_figure(data_key, _subreddit_stats):
+    """Build the posts-per-subreddit bar chart coloured by average score"""
+    px = _plotly_express()
+    fig = px.bar(_subreddit_stats, x='subreddit', y='count',
+                 title="Number of Matching Posts by Subreddit",
+                 hover_data=['avg_score'],
+                 color='avg_score',
+                 color_continuous_scale='Viridis')
     
-    return filtered
+    fig.update_layout(
+        xaxis_title="Subreddit",
+        yaxis_title="Number of Posts",
+        coloraxis_colorbar_title="Avg Score"
+    )
+    return fig
 
-def create_data_visualization(results):
-    """Create data visualizations based on results"""
+@st.cache_resource(show_spinner=False, max_entries=64)
+def hour_bar_figure(data_key, _hours_df):
+    """Build the posts-by-hour-of-day bar chart"""
+    px = _plotly_express()
+    fig = px.bar(_hours_df, x='hour_of_day', y='count',
+                 title="Posts by Hour of Day (UTC)",
+                 color_discrete_sequence=['#1f77b4'])  # Use a standard blue color
+    
+    fig.update_layout(
+        xaxis_title="Hour of Day (UTC)",
+        yaxis_title="Number of Posts",
+        xaxis=dict(
+            tickmode='linear', 
+            tick0=0, 
+            dtick=2,  # Show every other hour for cleaner look
+            range=[-0.5, 23.5],  # Ensure all hours are shown
+            ticktext=[f"{h}" for h in range(0, 24, 2)],  # Custom labels
+            tickvals=list(range(0, 24, 2))
+        )
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def weekday_bar_figure(data_key, _day_counts):
+    """Build the posts-by-day-of-week bar chart"""
+    px = _plotly_express()
+    fig = px.bar(_day_counts, x='day', y='count',
+                 title="Posts by Day of Week",
+                 color_discrete_sequence=['#2ca02c'])  # Use a standard green color
+    
+    fig.update_layout(
+        xaxis_title="Day of Week",
+        yaxis_title="Number of Posts",
+        xaxis=dict(
+            categoryorder='array',
+            categoryarray=DAY_ORDER
+        )
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def volume_line_figure(data_key, _date_counts):
+    """Build the post volume over time line chart"""
+    px = _plotly_express()
+    fig = px.line(_date_counts, x='post_date', y='count',
+                  title="Post Volume Over Time",
+                  markers=True)
+    
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title="Number of Posts"
+    )
+    return fig
+
+def create_data_visualization(df, data_key):
+    """Create data visualizations based on the filtered results DataFrame
+    
+    data_key is the (search_id, filters_key) pair identifying the charted data
+    for the cached figures.
+    """
     try:
         # Check if we have any data
-        total_posts = sum(len(posts) for posts in results.values())
+        total_posts = len(df)
         if total_posts == 0:
             st.warning("No posts found matching your search criteria. Try adjusting your filters.")
             return
             
         # Output debug information to help diagnose issues
-        st.write(f"Preparing to visualize data from {len(results)} subreddits with {total_posts} total posts")
+        st.write(f"Preparing to visualize data from {df['subreddit'].nunique()} subreddits with {total_posts} total posts")
         
         # Ensure plotly is properly imported and initialized
         try:
-            import plotly.express as px
-            import plotly.graph_objects as go
+            _plotly_express()
             st.write("✅ Plotly modules imported successfully")
         except Exception as e:
             st.error(f"⚠️ Error importing Plotly modules: {str(e)}")
             import sys
             st.write("Python path:", sys.path)
             return
-            
-        # Combine all results
-        all_posts = []
-        skipped_posts = 0
-        for subreddit, posts in results.items():
-            for post in posts:
-                try:
-                    post_copy = post.copy()
-                    post_copy['subreddit'] = subreddit
-                    all_posts.append(post_copy)
-                except Exception as e:
-                    skipped_posts += 1
-                    st.warning(f"Error processing post: {str(e)}")
-                    continue  # Skip this post but continue processing others
-        
-        if skipped_posts > 0:
-            st.warning(f"Skipped {skipped_posts} post(s) due to formatting errors.")
-            
-        if not all_posts:
-            st.warning("No valid data to visualize.")
-            return
-        
-        # Create DataFrame
-        df = pd.DataFrame(all_posts)
         
         # Display raw data sample for debugging
         with st.expander("Debug: View raw data sample"):
@@ -176,8 +451,7 @@ def create_data_visualization(results):
             
         # Ensure score column is numeric
         try:
-            df['score'] = pd.to_numeric(df['score'], errors='coerce')
-            df = df.dropna(subset=['score'])
+            df = df.assign(score=pd.to_numeric(df['score'], errors='coerce')).dropna(subset=['score'])
             st.write(f"Processed {len(df)} posts with valid scores")
         except Exception as e:
             st.error(f"Error converting scores to numeric values: {str(e)}")
@@ -190,31 +464,27 @@ def create_data_visualization(results):
         with viz_tab1:
             try:
                 # Calculate a robust max score limit to handle extreme outliers
-                # Use IQR method for better outlier detection
-                q1 = df['score'].quantile(0.25)
-                q3 = df['score'].quantile(0.75)
+                # Use IQR method for better outlier detection (all quantiles in one numpy pass)
+                scores = df['score'].to_numpy(dtype=float)
+                q1, q3, q95 = np.quantile(scores, [0.25, 0.75, 0.95])
+                score_max = scores.max()
                 iqr = q3 - q1
                 upper_bound = q3 + 1.5 * iqr
                 
                 # Cap at either the IQR-based upper bound or 95th percentile * 2, whichever is larger
                 # This gives a better visualization range while still showing important variations
-                max_score_display = max(min(upper_bound, df['score'].max()), df['score'].quantile(0.95) * 2)
+                max_score_display = max(min(upper_bound, score_max), q95 * 2)
                 
                 # Filter dataframe for visualization
-                filtered_df = df[df['score'] <= max_score_display]
+                in_display_range = scores <= max_score_display
+                filtered_df = df[in_display_range]
                 
                 # Create histogram with automatic bin calculation
-                nbins = min(20, len(filtered_df['score'].unique()))  # Adjust bins based on unique values
+                nbins = min(20, np.unique(scores[in_display_range]).size)  # Adjust bins based on unique values
                 
                 try:
                     # Try using plotly (preferred)
-                    fig = px.histogram(filtered_df, x="score", color="subreddit", nbins=nbins,
-                                     title="Distribution of Post Scores")
-                    fig.update_layout(
-                        xaxis_title="Score (Upvotes)",
-                        yaxis_title="Number of Posts",
-                        legend_title="Subreddit"
-                    )
+                    fig = score_histogram_figure(data_key, filtered_df, nbins)
                     st.plotly_chart(fig, use_container_width=True)
                 except Exception as e:
                     st.error(f"Error rendering plotly chart: {str(e)}")
@@ -222,8 +492,9 @@ def create_data_visualization(results):
                     
                     # Fallback to matplotlib
                     try:
+                        plt = _pyplot()
                         fig, ax = plt.subplots(figsize=(10, 6))
-                        filtered_df.groupby('subreddit')['score'].plot.hist(
+                        filtered_df.groupby('subreddit', observed=True)['score'].plot.hist(
                             alpha=0.6, bins=nbins, ax=ax)
                         ax.set_xlabel("Score (Upvotes)")
                         ax.set_ylabel("Number of Posts")
@@ -234,11 +505,10 @@ def create_data_visualization(results):
                         st.error(f"Fallback chart also failed: {str(e2)}")
                 
                 # Show excluded outliers info if any were filtered
-                outliers_count = len(df) - len(filtered_df)
+                outliers_count = int(scores.size - in_display_range.sum())
                 if outliers_count > 0:
                     if outliers_count == 1:
-                        highest_score = df['score'].max()
-                        st.info(f"1 high-scoring outlier post (score: {highest_score}) was excluded for better visualization scale. Max displayed score: {int(max_score_display)}.")
+                        st.info(f"1 high-scoring outlier post (score: {int(score_max)}) was excluded for better visualization scale. Max displayed score: {int(max_score_display)}.")
                     else:
                         st.info(f"{outliers_count} high-scoring outlier posts were excluded for better visualization scale. Max displayed score: {int(max_score_display)}.")
             except Exception as e:
@@ -247,35 +517,19 @@ def create_data_visualization(results):
         # Posts by Subreddit
         with viz_tab2:
             try:
-                # Get counts and sort by count for better visualization
-                subreddit_counts = df['subreddit'].value_counts().reset_index()
-                subreddit_counts.columns = ['subreddit', 'count']
+                # Get counts and average score per subreddit in a single groupby
+                subreddit_stats = df.groupby('subreddit', observed=True).agg(
+                    count=('score', 'size'),
+                    avg_score=('score', 'mean')
+                ).reset_index()
                 
                 # Sort by count descending for better visualization
-                subreddit_counts = subreddit_counts.sort_values('count', ascending=False)
-                
-                # Calculate average score per subreddit for additional insights
-                subreddit_avg_scores = df.groupby('subreddit')['score'].mean().reset_index()
-                subreddit_avg_scores.columns = ['subreddit', 'avg_score']
-                
-                # Merge the data
-                subreddit_stats = subreddit_counts.merge(subreddit_avg_scores, on='subreddit')
+                subreddit_stats = subreddit_stats.sort_values('count', ascending=False)
                 
                 # Create bar chart
                 try:
                     # Try using plotly (preferred)
-                    fig = px.bar(subreddit_stats, x='subreddit', y='count',
-                               title="Number of Matching Posts by Subreddit",
-                               hover_data=['avg_score'],
-                               color='avg_score',
-                               color_continuous_scale='Viridis')
-                    
-                    fig.update_layout(
-                        xaxis_title="Subreddit",
-                        yaxis_title="Number of Posts",
-                        coloraxis_colorbar_title="Avg Score"
-                    )
-                    
+                    fig = subreddit_bar_figure(data_key, subreddit_stats)
                     st.plotly_chart(fig, use_container_width=True)
                 except Exception as e:
                     st.error(f"Error rendering plotly chart: {str(e)}")
@@ -283,6 +537,7 @@ def create_data_visualization(results):
                     
                     # Fallback to matplotlib
                     try:
+                        plt = _pyplot()
                         fig, ax = plt.subplots(figsize=(10, 6))
                         subreddit_stats.plot.bar(x='subreddit', y='count', ax=ax, colormap='viridis')
                         ax.set_xlabel("Subreddit")
@@ -297,61 +552,34 @@ def create_data_visualization(results):
         # Time Analysis
         with viz_tab3:
             try:
-                if 'created_utc' in df.columns:
-                    # Create a copy of the dataframe for time analysis
-                    time_df = df.copy()
-                    
-                    # Handle different date formats with better error handling
-                    time_df['created_date'] = pd.to_datetime(time_df['created_utc'], errors='coerce')
+                if 'created_date' in df.columns:
+                    # created_date is parsed once per search in results_to_dataframe using
+                    # the scraper's fixed DATE_FORMAT; unparseable timestamps are NaT
                     
                     # Filter out rows where date parsing failed
-                    valid_dates = time_df['created_date'].notna()
-                    invalid_dates_count = len(time_df) - valid_dates.sum()
+                    valid_dates = df['created_date'].notna()
+                    valid_dates_count = int(valid_dates.sum())
+                    invalid_dates_count = len(df) - valid_dates_count
                     
-                    if valid_dates.sum() == 0:
+                    if valid_dates_count == 0:
                         st.warning("Could not parse any date formats. Please check the date formatting in your data.")
                         return
                     elif invalid_dates_count > 0:
-                        st.warning(f"{invalid_dates_count} posts ({invalid_dates_count/len(time_df):.1%}) had invalid date formats and were excluded from time analysis.")
+                        st.warning(f"{invalid_dates_count} posts ({invalid_dates_count/len(df):.1%}) had invalid date formats and were excluded from time analysis.")
                     
-                    time_df = time_df[valid_dates]
+                    time_df = df[valid_dates]
                     
                     # Create two columns for hour and day charts
                     time_col1, time_col2 = st.columns(2)
                     
                     with time_col1:
-                        # Extract hour of day
-                        time_df['hour_of_day'] = time_df['created_date'].dt.hour
-                        
-                        # Create the histogram with all hours (0-23) represented
-                        hours_df = pd.DataFrame({'hour_of_day': range(24)})
-                        hour_counts = time_df['hour_of_day'].value_counts().reset_index()
-                        hour_counts.columns = ['hour', 'count']
-                        hours_df = hours_df.merge(hour_counts, left_on='hour_of_day', right_on='hour', how='left').fillna(0)
-                        
-                        # Add hour labels with AM/PM for better readability
-                        hours_df['hour_label'] = hours_df['hour_of_day'].apply(
-                            lambda x: f"{x}:00" + (" AM" if x < 12 else " PM")
-                        )
+                        # Count posts per hour of day with all hours (0-23) represented
+                        hour_counts = np.bincount(time_df['created_date'].dt.hour.to_numpy(), minlength=24)
+                        hours_df = pd.DataFrame({'hour_of_day': np.arange(24), 'count': hour_counts})
                         
                         try:
                             # Try using plotly (preferred)
-                            fig = px.bar(hours_df, x='hour_of_day', y='count',
-                                        title="Posts by Hour of Day (UTC)",
-                                        color_discrete_sequence=['#1f77b4'])  # Use a standard blue color
-                            
-                            fig.update_layout(
-                                xaxis_title="Hour of Day (UTC)",
-                                yaxis_title="Number of Posts",
-                                xaxis=dict(
-                                    tickmode='linear', 
-                                    tick0=0, 
-                                    dtick=2,  # Show every other hour for cleaner look
-                                    range=[-0.5, 23.5],  # Ensure all hours are shown
-                                    ticktext=[f"{h}" for h in range(0, 24, 2)],  # Custom labels
-                                    tickvals=list(range(0, 24, 2))
-                                )
-                            )
+                            fig = hour_bar_figure(data_key, hours_df)
                             st.plotly_chart(fig, use_container_width=True)
                         except Exception as e:
                             st.error(f"Error rendering plotly chart: {str(e)}")
@@ -359,6 +587,7 @@ def create_data_visualization(results):
                             
                             # Fallback to matplotlib
                             try:
+                                plt = _pyplot()
                                 fig, ax = plt.subplots(figsize=(10, 6))
                                 hours_df.plot.bar(x='hour_of_day', y='count', ax=ax, color='#1f77b4')
                                 ax.set_xlabel("Hour of Day (UTC)")
@@ -372,31 +601,13 @@ def create_data_visualization(results):
                                 st.error(f"Fallback chart also failed: {str(e2)}")
                     
                     with time_col2:
-                        # Add a day of week visualization
-                        time_df['day_of_week'] = time_df['created_date'].dt.day_name()
-                        
-                        # Make sure days are in correct order
-                        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                        day_counts = time_df['day_of_week'].value_counts().reindex(day_order).reset_index()
-                        day_counts.columns = ['day', 'count']
-                        
-                        # Add day shortnames for better display
-                        day_counts['day_short'] = day_counts['day'].apply(lambda x: x[:3])
+                        # Add a day of week visualization; weekday 0 is Monday, matching DAY_ORDER
+                        weekday_counts = np.bincount(time_df['created_date'].dt.weekday.to_numpy(), minlength=7)
+                        day_counts = pd.DataFrame({'day': DAY_ORDER, 'count': weekday_counts})
                         
                         try:
                             # Try using plotly (preferred)
-                            fig = px.bar(day_counts, x='day', y='count',
-                                        title="Posts by Day of Week",
-                                        color_discrete_sequence=['#2ca02c'])  # Use a standard green color
-                            
-                            fig.update_layout(
-                                xaxis_title="Day of Week",
-                                yaxis_title="Number of Posts",
-                                xaxis=dict(
-                                    categoryorder='array',
-                                    categoryarray=day_order
-                                )
-                            )
+                            fig = weekday_bar_figure(data_key, day_counts)
                             st.plotly_chart(fig, use_container_width=True)
                         except Exception as e:
                             st.error(f"Error rendering plotly chart: {str(e)}")
@@ -404,6 +615,7 @@ def create_data_visualization(results):
                             
                             # Fallback to matplotlib
                             try:
+                                plt = _pyplot()
                                 fig, ax = plt.subplots(figsize=(10, 6))
                                 day_counts.plot.bar(x='day', y='count', ax=ax, color='#2ca02c')
                                 ax.set_xlabel("Day of Week")
@@ -416,24 +628,14 @@ def create_data_visualization(results):
                     # Add a date range histogram to show post distribution over time
                     st.subheader("Post Distribution Over Time")
                     
-                    # Extract date only (no time) for grouping
-                    time_df['post_date'] = time_df['created_date'].dt.date
-                    
-                    # Group by date and count posts
-                    date_counts = time_df.groupby('post_date').size().reset_index(name='count')
-                    date_counts['post_date'] = pd.to_datetime(date_counts['post_date'])
+                    # Count posts per calendar day, staying in datetime64 throughout
+                    date_counts = (time_df.resample('D', on='created_date').size()
+                                   .rename_axis('post_date').reset_index(name='count'))
                     
                     # Plot the time series
                     try:
                         # Try using plotly (preferred)
-                        fig = px.line(date_counts, x='post_date', y='count',
-                                    title="Post Volume Over Time",
-                                    markers=True)
-                        
-                        fig.update_layout(
-                            xaxis_title="Date",
-                            yaxis_title="Number of Posts"
-                        )
+                        fig = volume_line_figure(data_key, date_counts)
                         st.plotly_chart(fig, use_container_width=True)
                     except Exception as e:
                         st.error(f"Error rendering plotly chart: {str(e)}")
@@ -441,6 +643,7 @@ def create_data_visualization(results):
                         
                         # Fallback to matplotlib
                         try:
+                            plt = _pyplot()
                             fig, ax = plt.subplots(figsize=(10, 6))
                             date_counts.plot(x='post_date', y='count', kind='line', 
                                             marker='o', ax=ax)
@@ -459,16 +662,19 @@ def create_data_visualization(results):
         st.error(f"Error generating visualizations: {str(e)}")
 
 def main():
-    # Suppress the "No secrets files found" warning
-    warnings.filterwarnings("ignore", message="No secrets files found.*")
+    # The "No secrets files found" warning filter is installed once at import time
     
     # Ensure session state variables are initialized
     if 'results' not in st.session_state:
         st.session_state['results'] = None
+    if 'search_id' not in st.session_state:
+        st.session_state['search_id'] = None
+    if 'total_posts' not in st.session_state:
+        st.session_state['total_posts'] = 0
     if 'scraper' not in st.session_state:
         st.session_state['scraper'] = None
     if 'search_history' not in st.session_state:
-        st.session_state['search_history'] = []
+        st.session_state['search_history'] = deque(maxlen=MAX_SEARCH_HISTORY)
     if 'filters' not in st.session_state:
         st.session_state['filters'] = {
             'min_score': 0,
@@ -501,8 +707,18 @@ def main():
         limit = st.slider("Number of posts to scan per subreddit", 10, 200, 50)
         sort_by = st.selectbox("Sort posts by", ["hot", "new", "top", "rising"], index=0)
         include_selftext = st.checkbox("Include post content in search", value=True)
-        include_comments = st.checkbox("Include comments in search", value=True)
+        include_comments = st.checkbox("Include comments in search", value=True,
+            help="Comments are only fetched for posts whose title or content "
+                 "doesn't already match, to save API requests.")
         min_score = st.slider("Minimum score (upvotes)", 0, 1000, 0)
+        server_search = st.checkbox(
+            "Let Reddit search for the keywords", value=False,
+            help="Only posts Reddit's search matches are downloaded, which saves requests. "
+                 "Reddit matches whole words only, and posts matching just in comments are missed.")
+        combined_listing = len(subreddits) > 1 and st.checkbox(
+            "Fetch subreddits as one combined listing", value=False,
+            help="Uses a single r/a+b+c listing, which needs fewer API requests. "
+                 "Busy subreddits may then take more than their share of the posts scanned.")
         
         # Action buttons
         search_col, clear_col = st.columns(2)
@@ -511,12 +727,13 @@ def main():
         with clear_col:
             clear_button = st.button("Clear Results", type="secondary", use_container_width=True)
     
-    # Main interface tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Results", "Visualizations", "Export", "History", "API Credentials"])
-    
     # Handle Actions
     if clear_button:
         st.session_state.results = None
+        st.session_state.search_id = None
+        st.session_state.total_posts = 0
+        # Only this session's state is reset; the shared caches are keyed by
+        # search_id and bounded by max_entries/ttl, so other sessions keep theirs
         st.rerun()
     
     if search_button:
@@ -532,11 +749,29 @@ def main():
                 sort_by=sort_by,
                 include_comments=include_comments,
                 include_selftext=include_selftext,
-                min_score=min_score
+                min_score=min_score,
+                combined_listing=combined_listing,
+                server_search=server_search
             )
             if success:
                 st.success(f"Search completed! Found results in {len(st.session_state.results)} subreddits.")
     
+    render_tabs()
+
+@st.fragment
+def render_tabs():
+    """Draw the main interface tabs
+    
+    Runs as a fragment, so filter, pagination and export widgets rerun only the
+    tabs instead of the whole script; the sidebar search triggers a full rerun.
+    """
+    # Main interface tabs
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Results", "Visualizations", "Export", "History", "API Credentials"])
+    
+    # Flatten the results once per rerun for the Results, Visualizations and Export tabs
+    if st.session_state.results:
+        results_df = results_to_dataframe(st.session_state.results, st.session_state.search_id)
+    
     # Tab 1: Results
     with tab1:
         if st.session_state.results:
@@ -558,33 +793,43 @@ def main():
                     "To date", value=None)
             
             st.session_state.filters['show_only_with_comments'] = st.checkbox(
-                "Show only posts with matching comments", 
-                value=st.session_state.filters['show_only_with_comments'])
-            
-            apply_filters = st.button("Apply Filters")
+                "Show only posts matched via comments",
+                value=st.session_state.filters['show_only_with_comments'],
+                help="Comments are only searched when a post's title and content don't match, "
+                     "so posts whose title or content matched are left out even if their comments match too.")
             st.markdown('</div>', unsafe_allow_html=True)
             
-            # Apply filters if requested
-            if apply_filters:
-                filtered_results = filter_results(st.session_state.results, st.session_state.filters)
-            else:
-                filtered_results = st.session_state.results
+            # Filters apply as soon as a widget changes; unchanged filters hit the memo.
+            # Computed once here and reused by the Visualizations and Export tabs
+            filtered_df = filter_results(results_df, st.session_state.search_id, st.session_state.filters)
             
             # Show results for each subreddit
-            total_posts = sum(len(posts) for posts in filtered_results.values())
-            st.subheader(f"Search Results ({total_posts} posts found)")
+            st.subheader(f"Search Results ({len(filtered_df)} posts found)")
             
-            for subreddit, posts in filtered_results.items():
-                with st.expander(f"r/{subreddit} - {len(posts)} posts", expanded=len(filtered_results) == 1):
-                    if posts:
-                        # Create a dataframe for easier viewing
-                        df = pd.DataFrame([{
-                            'Title': p['title'], 
-                            'Score': p['score'],
-                            'Comments': p['num_comments'],
-                            'Date': p['created_utc'],
-                            'URL': p['permalink']
-                        } for p in posts])
+            # Build the table view once, and group row positions by subreddit in one pass
+            display_df = filtered_df[list(DISPLAY_COLUMNS)].rename(columns=DISPLAY_COLUMNS)
+            subreddit_rows = filtered_df.groupby('subreddit', observed=True).indices
+            no_rows = np.array([], dtype=np.intp)
+            
+            for subreddit in st.session_state.results:
+                rows = subreddit_rows.get(subreddit, no_rows)
+                posts = filtered_df.iloc[rows]
+                with st.expander(f"r/{subreddit} - {len(posts)} posts", expanded=len(st.session_state.results) == 1):
+                    if len(posts) > 0:
+                        # Table of this subreddit's posts for easier viewing
+                        df = display_df.iloc[rows].reset_index(drop=True)
+                        
+                        # Only send one page of rows to the browser per rerun
+                        if len(df) > PAGE_SIZES[0]:
+                            page_col1, page_col2 = st.columns(2)
+                            with page_col1:
+                                page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1,
+                                                         key=f"page_size_{subreddit}")
+                            with page_col2:
+                                page = st.number_input("Page", min_value=1,
+                                                       max_value=math.ceil(len(df) / page_size),
+                                                       value=1, key=f"page_{subreddit}")
+                            df = df.iloc[(page - 1) * page_size:page * page_size]
                         
                         st.dataframe(df, use_container_width=True)
                         
@@ -604,7 +849,7 @@ def main():
                                                   0, len(posts)-1, 0)
                         
                         if len(posts) > 0:
-                            post = posts[post_index]
+                            post = posts.iloc[post_index]
                             
                             # Display post details in a card
                             st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -619,9 +864,13 @@ def main():
                                     show_content = st.checkbox("Show full content", key=f"content_{subreddit}_{post_index}")
                                     if show_content:
                                         st.text(post['text'])
+                                    else:
+                                        # Only a short preview is sent to the browser by default
+                                        text = post['text']
+                                        st.text(text[:TEXT_PREVIEW_CHARS] + ("…" if len(text) > TEXT_PREVIEW_CHARS else ""))
                             
                             # Show matching comments if available
-                            if 'matching_comments' in post and post['matching_comments']:
+                            if post['has_matching_comments']:
                                 st.markdown(f"##### Matching Comments ({len(post['matching_comments'])})")
                                 with st.container():
                                     show_comments = st.checkbox("Show comments", value=True, key=f"comments_{subreddit}_{post_index}")
@@ -663,16 +912,15 @@ def main():
         if st.session_state.results:
             # Display loading state while generating visualizations
             with st.spinner("Generating visualizations..."):
-                # Apply current filters to visualization data
-                filtered_results = filter_results(st.session_state.results, st.session_state.filters)
-                
-                # Check if we have any results after filtering
-                total_posts = sum(len(posts) for posts in filtered_results.values())
-                if total_posts == 0:
+                # Check if we have any results after filtering (applied in the Results tab)
+                if len(filtered_df) == 0:
                     st.warning("No posts match your current filters. Try adjusting your filter criteria.")
                 else:
                     # Continue with visualization
-                    create_data_visualization(filtered_results)
+                    # The search and filter settings fully determine the charted data,
+                    # so key the cached figures on them instead of hashing the columns
+                    create_data_visualization(filtered_df, data_key=(
+                        st.session_state.search_id, _filters_key(st.session_state.filters)))
         else:
             st.info("Run a search to generate visualizations.")
     
@@ -681,11 +929,8 @@ def main():
         if st.session_state.results:
             st.subheader("Export Results")
             
-            # Apply current filters
-            filtered_results = filter_results(st.session_state.results, st.session_state.filters)
-            
             # Format selection
-            export_format = st.radio("Export format", ["CSV", "JSON"], horizontal=True)
+            export_format = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True)
             
             # Filename input
             timestamp = time.strftime("%Y%m%d_%H%M%S")
@@ -697,53 +942,19 @@ def main():
             
             if export_clicked:
                 try:
-                    # Combine all results into a flat list for export
-                    all_results = []
-                    for subreddit, posts in filtered_results.items():
-                        for post in posts:
-                            post_copy = post.copy()
-                            post_copy['subreddit'] = subreddit
-                            all_results.append(post_copy)
+                    extension, mime = EXPORT_FORMATS[export_format]
+                    export_file = f"{filename}.{extension}"
+                    
+                    # Create download button straight from the in-memory export
+                    st.download_button(
+                        label=f"Download {export_format}",
+                        data=export_bytes(filtered_df, st.session_state.search_id,
+                                          _filters_key(st.session_state.filters), export_format),
+                        file_name=export_file,
+                        mime=mime
+                    )
+                    st.success(f"Prepared {len(filtered_df)} posts for download as {export_file}")
                     
-                    # Save results based on selected format
-                    if export_format == "CSV":
-                        # Convert to dataframe and save
-                        df = pd.DataFrame(all_results)
-                        
-                        # Handle nested structures for CSV
-                        if 'matching_comments' in df.columns:
-                            df['matching_comments'] = df['matching_comments'].apply(
-                                lambda x: json.dumps(x) if isinstance(x, list) else ''
-                            )
-                        
-                        csv_file = f"{filename}.csv"
-                        df.to_csv(csv_file, index=False)
-                        
-                        # Create download button
-                        with open(csv_file, 'rb') as f:
-                            st.download_button(
-                                label="Download CSV",
-                                data=f,
-                                file_name=csv_file,
-                                mime="text/csv"
-                            )
-                        st.success(f"Exported {len(all_results)} posts to {csv_file}")
-                        
-                    else:  # JSON
-                        json_file = f"{filename}.json"
-                        with open(json_file, 'w') as f:
-                            json.dump(all_results, f, indent=2)
-                        
-                        # Create download button
-                        with open(json_file, 'rb') as f:
-                            st.download_button(
-                                label="Download JSON",
-                                data=f,
-                                file_name=json_file,
-                                mime="application/json"
-                            )
-                        st.success(f"Exported {len(all_results)} posts to {json_file}")
-                        
                 except Exception as e:
                     st.error(f"Export failed: {str(e)}")
         else:
@@ -754,8 +965,13 @@ def main():
         st.subheader("Search History")
         
         if st.session_state.search_history:
-            for i, search in enumerate(reversed(st.session_state.search_history)):
-                with st.expander(f"Search #{len(st.session_state.search_history)-i}: {search['timestamp']} ({search['total_results']} results)"):
+            history = st.session_state.search_history
+            show_older = len(history) > HISTORY_PREVIEW and st.checkbox("Show older searches")
+            
+            # History is stored newest first, so the preview is just the head of the deque
+            shown = history if show_older else itertools.islice(history, HISTORY_PREVIEW)
+            for search in shown:
+                with st.expander(f"Search #{search['number']}: {search['timestamp']} ({search['total_results']} results)"):
                     st.markdown(f"**Subreddits:** {', '.join(search['subreddits'])}")
                     st.markdown(f"**Keywords:** {', '.join(search['keywords'])}")
                     st.markdown(f"**Results:** {search['total_results']} posts")
@@ -777,7 +993,7 @@ def main():
         # But don't do this in production to avoid credential leakage
         is_local_dev = not os.environ.get('SPACE_ID') and not os.environ.get('SYSTEM')
         if is_local_dev:
-            load_dotenv()
+            load_env_once()
             # Only load from env if session state is empty (first load)
             if not st.session_state.client_id:
                 st.session_state.client_id = os.environ.get("REDDIT_CLIENT_ID", "")
@@ -819,10 +1035,12 @@ def main():
             if st.button("Initialize API Connection", type="primary"):
                 if initialize_scraper(client_id, client_secret, user_agent):
                     st.success("API connection established!")
-                    # Set environment variables for the current session
-                    os.environ["REDDIT_CLIENT_ID"] = client_id
-                    os.environ["REDDIT_CLIENT_SECRET"] = client_secret
-                    os.environ["REDDIT_USER_AGENT"] = user_agent
+                    # Set environment variables for the current session, skipping unchanged values
+                    for name, value in (("REDDIT_CLIENT_ID", client_id),
+                                        ("REDDIT_CLIENT_SECRET", client_secret),
+                                        ("REDDIT_USER_AGENT", user_agent)):
+                        if os.environ.get(name) != value:
+                            os.environ[name] = value
 
 if __name__ == "__main__":
     main()
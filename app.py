@@ -1,8 +1,7 @@
 import streamlit as st
 import os
 import pandas as pd
-import sys
-from dotenv import load_dotenv
+from advanced_scraper_ui import main, load_env_once
 
 # IMPORTANT: set_page_config must be the first Streamlit command called
 st.set_page_config(
@@ -12,25 +11,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Robust initialization of plotly to ensure it's properly loaded
-try:
-    import plotly.express as px
-    import plotly.graph_objects as go
-    # Force plotly to initialize its renderers
-    import plotly.io as pio
-    pio.renderers.default = "browser"
-except Exception as e:
-    st.error(f"Error initializing Plotly: {str(e)}")
-    st.write("Debug info:", sys.path)
+# Plotly is imported lazily by advanced_scraper_ui the first time a chart is
+# drawn; st.plotly_chart renders figures itself, so no renderer setup is needed
 
-# Disable static file serving to prevent the static folder warning
-# This configuration is set using environment variables instead of directly accessing server settings
-os.environ['STREAMLIT_SERVER_ENABLE_STATIC_SERVING'] = 'false'
+# Static file serving is disabled via .streamlit/config.toml (enableStaticServing = false),
+# which Streamlit reads at server startup before this script runs
 
 # Session state initialization is now handled in advanced_scraper_ui.py
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (parsed once per process, not on every rerun)
+load_env_once()
 
 # Custom CSS
 st.markdown("""
@@ -77,10 +67,6 @@ except Exception as e:
     # No secrets configured, will fall back to user input
     pass
 
-# Now that setup is complete, import the main function
-from enhanced_scraper import EnhancedRedditScraper
-from advanced_scraper_ui import main
-
 # Welcome message is now handled in advanced_scraper_ui.py in the Credentials tab
 
 # Run the main application
@@ -1,12 +1,86 @@
 import praw
+import prawcore
 import pandas as pd
 import datetime
 import re
-import json
 import os
 import os.path
-from typing import List, Dict, Any, Optional
+import queue
+import functools
+import contextlib
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Callable, Iterator
 from dotenv import load_dotenv
+from export_utils import csv_bytes, json_text, json_bytes
+
+# Upper bound on subreddits fetched concurrently by search_multiple_subreddits
+MAX_CONCURRENT_SUBREDDITS = 8
+
+# Fields of the post dictionaries built by _match_submission, in output order
+POST_FIELDS = ['title', 'text', 'url', 'score', 'id', 'author', 'created_utc',
+               'upvote_ratio', 'num_comments', 'permalink']
+
+# Retries for a request Reddit rejects with HTTP 429, backing off from 1s
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Reddit search has no "rising" order; those searches fall back to relevance
+SEARCH_SORTS = {'hot': 'hot', 'new': 'new', 'top': 'top'}
+
+def _search_query(keywords: List[str]) -> str:
+    """
+    Build a Reddit search query matching any of the keywords as a phrase.
+    """
+    return " OR ".join('"{}"'.format(keyword.replace('"', '')) for keyword in keywords)
+
+def _with_backoff(fn: Callable, *args, **kwargs):
+    """
+    Call fn, retrying with exponential backoff when Reddit responds 429.
+    
+    Honors the Retry-After header when it is present, and adds +/-10% jitter
+    so concurrent workers don't retry in lockstep.
+    """
+    delay = 1.0
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        try:
+            return fn(*args, **kwargs)
+        except prawcore.exceptions.TooManyRequests as e:
+            if attempt == MAX_RATE_LIMIT_RETRIES:
+                raise
+            try:
+                wait = float(e.retry_after)
+            except (TypeError, ValueError):
+                wait = delay
+            time.sleep(wait * random.uniform(0.9, 1.1))
+            delay *= 2
+
+def _iter_with_backoff(iterable):
+    """
+    Iterate a PRAW listing, retrying a page fetch that is rate limited.
+    
+    ListingGenerator leaves its position untouched when a fetch fails, so a
+    retried next() resumes on the same page instead of restarting the listing.
+    """
+    iterator = iter(iterable)
+    while True:
+        try:
+            yield _with_backoff(next, iterator)
+        except StopIteration:
+            return
+
+@functools.lru_cache(maxsize=32)
+def _keyword_regex(keywords: tuple) -> re.Pattern:
+    """
+    Compile keywords into one case-insensitive alternation.
+    
+    A single regex scan per text replaces lowercasing the text and running
+    a substring search for every keyword.
+    """
+    if not keywords:
+        # Like any() over no keywords, never match
+        return re.compile(r'(?!)')
+    return re.compile('|'.join(map(re.escape, keywords)), re.IGNORECASE)
 
 class EnhancedRedditScraper:
     """
@@ -23,13 +97,20 @@ class EnhancedRedditScraper:
             client_secret: Reddit API client secret
             user_agent: User agent string for Reddit API
         """
-        self.reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent
-        )
+        self._credentials = {
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'user_agent': user_agent
+        }
+        self.reddit = praw.Reddit(**self._credentials)
         self.last_search_results = []
         
+        # PRAW instances are not thread-safe, so every scrape borrows a client from
+        # this pool; concurrent callers (worker threads, or app sessions sharing the
+        # scraper) each get their own, and clients are reused across searches
+        self._client_pool = queue.Queue()
+        self._client_pool.put(self.reddit)
+        
     def scrape_subreddit(self, 
                          subreddit_name: str, 
                          keywords: List[str], 
@@ -37,7 +118,8 @@ class EnhancedRedditScraper:
                          sort_by: str = "hot",
                          include_comments: bool = False,
                          min_score: int = 0,
-                         include_selftext: bool = True) -> List[Dict[str, Any]]:
+                         include_selftext: bool = True,
+                         server_search: bool = False) -> List[Dict[str, Any]]:
         """
         Scrape a subreddit for posts containing specified keywords.
         
@@ -49,100 +131,319 @@ class EnhancedRedditScraper:
             include_comments: Whether to search post comments 
             min_score: Minimum score (upvotes) for posts
             include_selftext: Whether to search post content (selftext)
+            server_search: Whether to let Reddit's search pick candidate posts
+                instead of scanning the listing (comment-only matches are missed)
             
         Returns:
             List of matching post dictionaries
         """
-        subreddit = self.reddit.subreddit(subreddit_name)
-        results = []
+        results = self._scrape_with_pooled_client(subreddit_name, keywords, limit=limit,
+                                                  sort_by=sort_by, include_comments=include_comments,
+                                                  min_score=min_score, include_selftext=include_selftext,
+                                                  server_search=server_search)
+        
+        # Store last search results
+        self.last_search_results = results
+        return results
+    
+    def iter_subreddit(self, subreddit_name: str, keywords: List[str], **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Yield matching posts from a subreddit as they are found.
+        
+        Takes the same arguments as scrape_subreddit, so callers can show the
+        first hits before the whole listing is scanned. last_search_results is
+        not updated.
+        """
+        with self._pooled_client() as reddit:
+            yield from self._iter_matches(reddit, subreddit_name, keywords, **kwargs)
+    
+    def _iter_matches(self,
+                      reddit: praw.Reddit,
+                      subreddit_name: str,
+                      keywords: List[str],
+                      limit: int = 100,
+                      sort_by: str = "hot",
+                      include_comments: bool = False,
+                      min_score: int = 0,
+                      include_selftext: bool = True,
+                      server_search: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Yield matching posts from a subreddit using the given Reddit client.
+        
+        Takes the same arguments as scrape_subreddit, but does not touch
+        last_search_results so it can run concurrently.
+        """
+        subreddit = reddit.subreddit(subreddit_name)
+        keyword_search = _keyword_regex(tuple(keywords)).search
+        
+        query = _search_query(keywords) if server_search else None
+        
+        for submission in _iter_with_backoff(self._listing(subreddit, sort_by, limit, query)):
+            post_data = self._match_submission(submission, keyword_search, include_comments,
+                                               min_score, include_selftext)
+            if post_data is not None:
+                yield post_data
+    
+    @staticmethod
+    def _listing(subreddit, sort_by: str, limit: int, query: Optional[str] = None):
+        """
+        Return the subreddit listing for the given sort order.
+        
+        With a query, Reddit's search returns only posts matching it, so
+        posts that can't match aren't downloaded at all.
+        """
+        if query:
+            return subreddit.search(query, sort=SEARCH_SORTS.get(sort_by, 'relevance'), limit=limit)
         
         # Choose the right sort method
         if sort_by == "hot":
-            submissions = subreddit.hot(limit=limit)
+            return subreddit.hot(limit=limit)
         elif sort_by == "new":
-            submissions = subreddit.new(limit=limit)
+            return subreddit.new(limit=limit)
         elif sort_by == "top":
-            submissions = subreddit.top(limit=limit)
+            return subreddit.top(limit=limit)
         elif sort_by == "rising":
-            submissions = subreddit.rising(limit=limit)
+            return subreddit.rising(limit=limit)
         else:
-            submissions = subreddit.hot(limit=limit)
-        
-        # Process each submission
-        for submission in submissions:
-            # Check if post meets the minimum score requirement
-            if submission.score < min_score:
-                continue
-                
-            # Check for keywords in title or selftext
-            title_match = any(keyword.lower() in submission.title.lower() for keyword in keywords)
-            selftext_match = False
+            return subreddit.hot(limit=limit)
+    
+    @staticmethod
+    def _match_submission(submission,
+                          keyword_search: Callable,
+                          include_comments: bool,
+                          min_score: int,
+                          include_selftext: bool) -> Optional[Dict[str, Any]]:
+        """
+        Build the post dictionary for a submission that matches, or return None.
+        """
+        # Read the fields used for both matching and output once
+        score = submission.score
+        title = submission.title
+        selftext = submission.selftext
+        
+        # Check if post meets the minimum score requirement
+        if score < min_score:
+            return None
             
-            if include_selftext:
-                selftext_match = any(keyword.lower() in submission.selftext.lower() for keyword in keywords)
+        # Check for keywords in title or selftext, stopping at the first hit
+        title_match = keyword_search(title) is not None
+        selftext_match = False
+        
+        if include_selftext and not title_match:
+            selftext_match = keyword_search(selftext) is not None
+        
+        comment_match = False
+        comments_data = []
+        
+        # Search comments only if the post hasn't already matched, since
+        # expanding the comment tree costs extra requests per post
+        if include_comments and not (title_match or selftext_match):
+            # Drop MoreComments placeholders instead of expanding them; the first
+            # page of the comment tree (one request) already holds more than 20
+            _with_backoff(lambda: submission.comments.replace_more(limit=0))
+            for comment in submission.comments.list()[:20]:  # Limit to first 20 comments
+                if keyword_search(comment.body):
+                    comment_match = True
+                    comments_data.append({
+                        'author': str(comment.author),
+                        'body': comment.body,
+                        'score': comment.score,
+                        'created_utc': datetime.datetime.fromtimestamp(comment.created_utc).strftime('%Y-%m-%d %H:%M:%S')
+                    })
+        
+        # Add post to results if it matches criteria
+        if title_match or selftext_match or comment_match:
+            created_time = datetime.datetime.fromtimestamp(submission.created_utc)
             
-            comment_match = False
-            comments_data = []
+            post_data = {
+                'title': title,
+                'text': selftext,
+                'url': submission.url,
+                'score': score,
+                'id': submission.id,
+                'author': str(submission.author),
+                'created_utc': created_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'upvote_ratio': submission.upvote_ratio,
+                'num_comments': submission.num_comments,
+                'permalink': f"https://www.reddit.com{submission.permalink}",
+            }
             
-            # Search comments if enabled
-            if include_comments:
-                submission.comments.replace_more(limit=3)  # Load some MoreComments
-                for comment in submission.comments.list()[:20]:  # Limit to first 20 comments
-                    if any(keyword.lower() in comment.body.lower() for keyword in keywords):
-                        comment_match = True
-                        comments_data.append({
-                            'author': str(comment.author),
-                            'body': comment.body,
-                            'score': comment.score,
-                            'created_utc': datetime.datetime.fromtimestamp(comment.created_utc).strftime('%Y-%m-%d %H:%M:%S')
-                        })
+            if include_comments and comments_data:
+                post_data['matching_comments'] = comments_data
             
-            # Add post to results if it matches criteria
-            if title_match or selftext_match or comment_match:
-                created_time = datetime.datetime.fromtimestamp(submission.created_utc)
-                
-                post_data = {
-                    'title': submission.title,
-                    'text': submission.selftext,
-                    'url': submission.url,
-                    'score': submission.score,
-                    'id': submission.id,
-                    'author': str(submission.author),
-                    'created_utc': created_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'upvote_ratio': submission.upvote_ratio,
-                    'num_comments': submission.num_comments,
-                    'permalink': f"https://www.reddit.com{submission.permalink}",
-                }
-                
-                if include_comments and comments_data:
-                    post_data['matching_comments'] = comments_data
-                
-                results.append(post_data)
+            return post_data
         
-        # Store last search results
-        self.last_search_results = results
-        return results
+        return None
+    
+    @contextlib.contextmanager
+    def _pooled_client(self):
+        """
+        Borrow a Reddit client from the pool, creating one if all are in use.
+        """
+        try:
+            reddit = self._client_pool.get_nowait()
+        except queue.Empty:
+            reddit = praw.Reddit(**self._credentials)
+        try:
+            yield reddit
+        finally:
+            self._client_pool.put(reddit)
+    
+    @staticmethod
+    def _unique_subreddits(subreddits: List[str]) -> List[str]:
+        """
+        De-duplicate subreddit names ignoring case, keeping the first spelling.
+        
+        Reddit treats names case-insensitively, so 'cuny' and 'CUNY' are one subreddit.
+        """
+        first_spelling = {}
+        for subreddit in subreddits:
+            first_spelling.setdefault(subreddit.lower(), subreddit)
+        return list(first_spelling.values())
+    
+    def _keep_last_results(self, results: Dict[str, List[Dict[str, Any]]]) -> None:
+        """
+        Match scrape_subreddit called in a loop: keep the final subreddit's posts.
+        """
+        self.last_search_results = next(reversed(results.values()))
+    
+    def _scrape_with_pooled_client(self, subreddit_name: str, keywords: List[str], **kwargs) -> List[Dict[str, Any]]:
+        """
+        Scrape a subreddit with a Reddit client borrowed from the pool.
+        """
+        with self._pooled_client() as reddit:
+            return list(self._iter_matches(reddit, subreddit_name, keywords, **kwargs))
     
     def search_multiple_subreddits(self, 
                                   subreddits: List[str], 
                                   keywords: List[str], 
+                                  progress_callback: Optional[Callable[[int, int, str], None]] = None,
                                   **kwargs) -> Dict[str, List[Dict[str, Any]]]:
         """
         Search multiple subreddits for the same keywords.
         
+        Subreddits are fetched concurrently (up to MAX_CONCURRENT_SUBREDDITS at
+        a time) since each scrape is dominated by network round-trips. PRAW
+        still applies Reddit's rate limits to every client.
+        
         Args:
             subreddits: List of subreddit names to search
             keywords: List of keywords to search for
+            progress_callback: Optional callable invoked as (completed, total, subreddit)
+                each time a subreddit finishes; it runs in the calling thread
             **kwargs: Additional arguments to pass to scrape_subreddit
             
         Returns:
             Dictionary mapping subreddit names to their results
         """
-        results = {}
-        for subreddit in subreddits:
-            results[subreddit] = self.scrape_subreddit(subreddit, keywords, **kwargs)
+        unique_subreddits = self._unique_subreddits(subreddits)
+        if not unique_subreddits:
+            return {}
+        
+        max_workers = min(MAX_CONCURRENT_SUBREDDITS, len(unique_subreddits))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._scrape_with_pooled_client, subreddit, keywords, **kwargs): subreddit
+                for subreddit in unique_subreddits
+            }
+            try:
+                for completed, future in enumerate(as_completed(futures), start=1):
+                    future.result()
+                    if progress_callback:
+                        progress_callback(completed, len(futures), futures[future])
+            except BaseException:
+                # Stop at the first failure as the sequential loop did: cancel the
+                # queued scrapes instead of letting the executor run them all on exit
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            
+            # Rebuild in the caller's ordering rather than completion order
+            scraped = {subreddit: future.result() for future, subreddit in futures.items()}
+            results = {subreddit: scraped[subreddit] for subreddit in unique_subreddits}
+        
+        self._keep_last_results(results)
+        return results
+    
+    def scrape_combined(self,
+                        subreddits: List[str],
+                        keywords: List[str],
+                        limit: int = 100,
+                        sort_by: str = "hot",
+                        include_comments: bool = False,
+                        min_score: int = 0,
+                        include_selftext: bool = True,
+                        server_search: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Search several subreddits through one combined "a+b+c" listing.
+        
+        Reddit serves the merged listing in a single paginated request stream
+        instead of one per subreddit. The listing is ranked across all of the
+        subreddits, so busy subreddits can take more than their share of the
+        limit * len(subreddits) posts scanned.
+        
+        Args:
+            subreddits: List of subreddit names to search
+            keywords: List of keywords to search for
+            limit: Maximum number of posts to retrieve per subreddit, on average
+            sort_by: How to sort posts ('hot', 'new', 'top', 'rising')
+            include_comments: Whether to search post comments
+            min_score: Minimum score (upvotes) for posts
+            include_selftext: Whether to search post content (selftext)
+            server_search: Whether to search the combined subreddits on Reddit's side
+            
+        Returns:
+            Dictionary mapping subreddit names to their results
+        """
+        unique_subreddits = self._unique_subreddits(subreddits)
+        if not unique_subreddits:
+            return {}
+        
+        # Listing posts report the canonical display name; match it case-insensitively
+        # (names are already de-duplicated ignoring case, so each key is distinct)
+        results = {subreddit: [] for subreddit in unique_subreddits}
+        by_name = {subreddit.lower(): results[subreddit] for subreddit in unique_subreddits}
+        keyword_search = _keyword_regex(tuple(keywords)).search
+        
+        with self._pooled_client() as reddit:
+            combined = reddit.subreddit("+".join(unique_subreddits))
+            listing = self._listing(combined, sort_by, limit * len(unique_subreddits),
+                                    _search_query(keywords) if server_search else None)
+            for submission in _iter_with_backoff(listing):
+                # Skip posts that don't map back to a requested subreddit before
+                # matching, so their comments are never fetched
+                posts = by_name.get(submission.subreddit.display_name.lower())
+                if posts is None:
+                    continue
+                post_data = self._match_submission(submission, keyword_search, include_comments,
+                                                   min_score, include_selftext)
+                if post_data is not None:
+                    posts.append(post_data)
+        
+        self._keep_last_results(results)
         return results
     
+    def to_dataframe(self, posts: Optional[List[Dict[str, Any]]] = None) -> pd.DataFrame:
+        """
+        Build a DataFrame from post dictionaries, one column at a time.
+        
+        Args:
+            posts: Post dictionaries to convert (defaults to the last search results)
+            
+        Returns:
+            DataFrame with one row per post and typed numeric columns
+        """
+        if posts is None:
+            posts = self.last_search_results
+        
+        # Gather each field into its own list so pandas gets ready-made columns
+        # instead of inferring them row by row from the dicts
+        columns = {field: [post[field] for post in posts] for field in POST_FIELDS}
+        if any('matching_comments' in post for post in posts):
+            columns['matching_comments'] = [post.get('matching_comments') for post in posts]
+        
+        df = pd.DataFrame(columns)
+        return df.astype({'score': 'int64', 'num_comments': 'int64', 'upvote_ratio': 'float64'})
+    
     def save_results_to_csv(self, filename: str) -> str:
         """
         Save the last search results to a CSV file.
@@ -156,19 +457,19 @@ class EnhancedRedditScraper:
         if not self.last_search_results:
             raise ValueError("No search results to save. Run a search first.")
         
-        df = pd.DataFrame(self.last_search_results)
+        df = self.to_dataframe()
         
         # Clean up comment data for CSV format
         if 'matching_comments' in df.columns:
-            df['matching_comments'] = df['matching_comments'].apply(
-                lambda x: json.dumps(x) if isinstance(x, list) else ''
-            )
+            df['matching_comments'] = [json_text(x) if isinstance(x, list) else ''
+                                       for x in df['matching_comments'].tolist()]
         
         # Add timestamp to filename
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         full_filename = f"{filename}_{timestamp}.csv"
         
-        df.to_csv(full_filename, index=False)
+        with open(full_filename, 'wb') as f:
+            f.write(csv_bytes(df))
         return os.path.abspath(full_filename)
     
     def save_results_to_json(self, filename: str) -> str:
@@ -188,9 +489,31 @@ class EnhancedRedditScraper:
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         full_filename = f"{filename}_{timestamp}.json"
         
-        with open(full_filename, 'w', encoding='utf-8') as f:
-            json.dump(self.last_search_results, f, ensure_ascii=False, indent=2)
+        with open(full_filename, 'wb') as f:
+            f.write(json_bytes(self.last_search_results))
+        
+        return os.path.abspath(full_filename)
+    
+    def save_results_to_parquet(self, filename: str) -> str:
+        """
+        Save the last search results to a zstd-compressed Parquet file.
+        
+        Requires pyarrow. Matching comments are kept as a nested column.
+        
+        Args:
+            filename: Name of the file to save (without extension)
+            
+        Returns:
+            Path to the saved file
+        """
+        if not self.last_search_results:
+            raise ValueError("No search results to save. Run a search first.")
+        
+        # Add timestamp to filename
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        full_filename = f"{filename}_{timestamp}.parquet"
         
+        self.to_dataframe().to_parquet(full_filename, index=False, compression='zstd')
         return os.path.abspath(full_filename)
 
 
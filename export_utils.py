@@ -0,0 +1,54 @@
+"""Serialization helpers shared by EnhancedRedditScraper and the Streamlit UI
+
+Imports neither praw nor streamlit, so the UI can use it without loading the
+scraper and the scraper can use it outside Streamlit.
+"""
+import io
+import json
+import warnings
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+# orjson serializes JSON several times faster; fall back to json if missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Rows converted to Arrow at a time when writing CSV
+CSV_CHUNK_ROWS = 5000
+
+def json_text(value):
+    """Serialize a value to a compact JSON string"""
+    if orjson is not None:
+        return orjson.dumps(value).decode('utf-8')
+    return json.dumps(value)
+
+def json_bytes(value):
+    """Serialize a value to indented UTF-8 JSON, keeping non-ASCII text as is"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, ensure_ascii=False, indent=2).encode('utf-8')
+
+def csv_bytes(df):
+    """Serialize a DataFrame to CSV bytes
+    
+    Uses PyArrow's native CSV writer and falls back to pandas, with a warning,
+    for columns Arrow cannot convert (e.g. mixed-type object columns). Rows are
+    converted CSV_CHUNK_ROWS at a time so only one chunk's Arrow copy is held at once.
+    """
+    buf = io.BytesIO()
+    try:
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        with pa_csv.CSVWriter(buf, schema) as writer:
+            for start in range(0, len(df), CSV_CHUNK_ROWS):
+                # Tables rather than record batches: columns of a concatenated
+                # frame can be chunked, which RecordBatch.from_pandas rejects
+                chunk = df.iloc[start:start + CSV_CHUNK_ROWS]
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    except pa.ArrowException as e:
+        warnings.warn(f"Arrow CSV write failed, falling back to pandas: {e}")
+        buf = io.BytesIO()
+        df.to_csv(buf, index=False)
+    return buf.getvalue()
@@ -46,7 +46,7 @@ echo ""
 echo "Verifying project files..."
 
 # Check for required files
-required_files=("app.py" "requirements.txt" "enhanced_scraper.py" "advanced_scraper_ui.py" "README-HF.md")
+required_files=("app.py" "requirements.txt" "enhanced_scraper.py" "advanced_scraper_ui.py" "export_utils.py" "README-HF.md")
 missing_files=0
 
 for file in "${required_files[@]}"; do
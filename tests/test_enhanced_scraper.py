@@ -0,0 +1,73 @@
+import queue
+import time
+import types
+
+import pytest
+
+import enhanced_scraper
+from enhanced_scraper import EnhancedRedditScraper
+
+
+class FakeSubreddit:
+    """Listing stub that records every scrape and fails for 's0'"""
+
+    def __init__(self, name, started):
+        self.name = name
+        self.started = started
+
+    def hot(self, limit):
+        self.started.append(self.name)
+        if self.name == 's0':
+            raise RuntimeError("listing failed")
+        time.sleep(0.05)
+        return iter([])
+
+
+def make_scraper(started):
+    """Build a scraper backed by fake Reddit clients, without touching the network"""
+    scraper = EnhancedRedditScraper.__new__(EnhancedRedditScraper)
+    scraper.last_search_results = []
+    scraper._client_pool = queue.Queue()
+    # Every pooled client (including ones created on demand) is this fake
+    fake_reddit = types.SimpleNamespace(subreddit=lambda name: FakeSubreddit(name, started))
+    scraper._credentials = {}
+    scraper._client_pool.put(fake_reddit)
+    return scraper, fake_reddit
+
+
+def test_search_multiple_subreddits_stops_after_first_failure(monkeypatch):
+    started = []
+    scraper, fake_reddit = make_scraper(started)
+    monkeypatch.setattr(enhanced_scraper.praw, 'Reddit', lambda **kwargs: fake_reddit)
+    monkeypatch.setattr(enhanced_scraper, 'MAX_CONCURRENT_SUBREDDITS', 2)
+
+    subreddits = [f"s{i}" for i in range(24)]
+    with pytest.raises(RuntimeError, match="listing failed"):
+        scraper.search_multiple_subreddits(subreddits, ['python'])
+
+    # Queued subreddits are cancelled instead of being scraped after the failure
+    assert 's0' in started
+    assert len(started) < len(subreddits)
+
+
+def test_scrape_combined_dedupes_subreddits_ignoring_case():
+    posts = [types.SimpleNamespace(subreddit=types.SimpleNamespace(display_name='CUNY'),
+                                   score=1, title='python help', selftext='', url='u',
+                                   id='abc', author='a', created_utc=0, upvote_ratio=1.0,
+                                   num_comments=0, permalink='/r/CUNY/abc')]
+    requested = []
+
+    def subreddit(name):
+        requested.append(name)
+        return types.SimpleNamespace(hot=lambda limit: iter(posts))
+
+    scraper, _ = make_scraper([])
+    scraper._client_pool = queue.Queue()
+    scraper._client_pool.put(types.SimpleNamespace(subreddit=subreddit))
+
+    results = scraper.scrape_combined(['cuny', 'CUNY'], ['python'])
+
+    assert requested == ['cuny']
+    assert list(results) == ['cuny']
+    assert [post['id'] for post in results['cuny']] == ['abc']
+    assert scraper.last_search_results == results['cuny']